@@ -6,12 +6,26 @@ TEV/AA二合一传感器通信模块和示例程序
 适用于pymodbus 2.5.3版本
 """
 
+import os
 import time
 import sys
-import serial.tools.list_ports
-from pymodbus.client.sync import ModbusSerialClient
-from pymodbus.exceptions import ModbusException
-from pymodbus.pdu import ExceptionResponse
+import json
+import struct
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+# 实时数据监测的轮询周期(秒)
+POLL_INTERVAL = 1.0
+
+# 输出重定向到文件时，每累计多少行监测数据写入一次
+OUTPUT_FLUSH_LINES = 10
+
+# 上次成功连接的串口保存位置
+LAST_PORT_FILE = os.path.join(os.path.expanduser('~'), '.tev_aa.json')
 
 
 def get_available_ports():
@@ -21,6 +35,9 @@ def get_available_ports():
     返回:
         list: 可用串口列表，格式为(端口名, 描述)的元组列表
     """
+    # 串口枚举模块仅在需要时导入
+    import serial.tools.list_ports
+    
     ports = []
     for port in serial.tools.list_ports.comports():
         ports.append((port.device, port.description))
@@ -34,35 +51,195 @@ def select_port():
     返回:
         str: 选择的串口名称，如果没有可用串口或用户取消，则返回None
     """
+    last_port = load_last_port()
     ports = get_available_ports()
     
     if not ports:
         print("没有检测到任何可用的串口设备")
         return None
     
+    default_index = None
     print("\n可用串口列表:")
     for i, (port, desc) in enumerate(ports):
-        print(f"{i+1}. {port} - {desc}")
+        if port == last_port:
+            default_index = i
+            print(f"{i+1}. {port} - {desc} (上次使用)")
+        else:
+            print(f"{i+1}. {port} - {desc}")
+    
+    if default_index is not None:
+        prompt = "\n请输入要使用的串口编号 (直接回车使用上次的串口，输入q退出): "
+    else:
+        prompt = "\n请输入要使用的串口编号 (输入q退出): "
+    
+    while True:
+        try:
+            choice = input(prompt)
+            if choice.lower() == 'q':
+                return None
+            
+            if not choice and default_index is not None:
+                return ports[default_index][0]
+            
+            index = int(choice) - 1
+            if 0 <= index < len(ports):
+                return ports[index][0]
+            print("无效的选择")
+        except ValueError:
+            print("请输入有效的编号")
+
+
+def load_last_port():
+    """
+    读取上次成功连接的串口
     
+    返回:
+        str: 串口名称，没有记录时返回None
+    """
     try:
-        choice = input("\n请输入要使用的串口编号 (输入q退出): ")
-        if choice.lower() == 'q':
-            return None
+        with open(LAST_PORT_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get('port')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def save_last_port(port):
+    """
+    保存本次成功连接的串口，下次启动时作为默认选项
+    
+    参数:
+        port (str): 串口名称
+    """
+    try:
+        with open(LAST_PORT_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'port': port}, f)
+    except OSError as e:
+        print(f"保存串口配置失败: {e}")
+
+
+def _generate_crc16_table():
+    """生成CRC-16/Modbus查找表(多项式0xA001)"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_TABLE = _generate_crc16_table()
+
+
+def crc16_modbus(data):
+    """
+    计算CRC-16/Modbus校验值
+    
+    参数:
+        data (bytes): 待校验的数据
+    
+    返回:
+        int: CRC校验值，按小端字节序附加在报文末尾
+    """
+    crc = 0xFFFF
+    for byte in data:
+        crc = (crc >> 8) ^ _CRC16_TABLE[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def _pymodbus_compute_crc(data):
+    """
+    与pymodbus.utilities.computeCRC兼容的CRC计算函数(返回高低字节交换后的值)
+    
+    pymodbus逐字节调用byte2int并查模块级查找表，这里改用本模块的查找表实现
+    """
+    crc = crc16_modbus(data)
+    return ((crc << 8) & 0xFF00) | (crc >> 8)
+
+
+def _build_read_frame(device_addr, address, count):
+    """
+    构造读保持寄存器(功能码03)的RTU请求帧
+    
+    参数:
+        device_addr (int): 设备地址
+        address (int): 寄存器地址(文档地址，从1开始)
+        count (int): 寄存器数量
+    
+    返回:
+        bytes: 带CRC校验的完整请求帧
+    """
+    frame = struct.pack('>BBHH', device_addr, 0x03, address - 1, count)
+    return frame + struct.pack('<H', crc16_modbus(frame))
+
+
+class ModbusDeviceError(IOError):
+    """设备返回的Modbus异常响应(如非法地址)或未连接时发起的请求，属于确定性错误，重试无意义"""
+
+
+def _ensure_connected(method):
+    """
+    传感器公共方法装饰器：调用前确保已连接到传感器
+    
+    公共方法入口负责自动连接；内部的_read_register/_write_register只做一次廉价的已连接检查，
+    未连接时直接抛出ModbusDeviceError，不会在已关闭的客户端上收发
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.connected and not self.connect():
+            raise ConnectionError("无法连接到传感器")
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+@functools.lru_cache(maxsize=None)
+def _fast_client_class():
+    """
+    获取使用快速解码的Modbus串口客户端类
+    
+    pymodbus依赖较多，导入耗时明显，因此在首次创建传感器对象时才导入
+    """
+    from pymodbus import utilities
+    from pymodbus.framer import rtu_framer
+    from pymodbus.client.sync import ModbusSerialClient
+    from pymodbus.register_read_message import ReadHoldingRegistersResponse
+    
+    # RTU帧的CRC计算和校验改用本模块的查找表实现(checkCRC内部调用computeCRC)
+    utilities.computeCRC = rtu_framer.computeCRC = _pymodbus_compute_crc
+    
+    class FastReadHoldingRegistersResponse(ReadHoldingRegistersResponse):
+        """
+        读保持寄存器响应
         
-        index = int(choice) - 1
-        if 0 <= index < len(ports):
-            return ports[index][0]
-        else:
-            print("无效的选择")
-            return select_port()  # 递归调用，重新选择
-    except ValueError:
-        print("请输入有效的编号")
-        return select_port()  # 递归调用，重新选择
+        pymodbus 2.5.3逐个寄存器调用struct.unpack解码，100个寄存器的波形数据
+        需要100次Python层循环，这里改为一次struct.unpack_from解码全部寄存器。
+        """
+        
+        def decode(self, data):
+            count = int(data[0]) // 2
+            self.registers = list(struct.unpack_from('>%dH' % count, data, 1))
+    
+    class FastSerialClient(ModbusSerialClient):
+        """功能码03响应改用FastReadHoldingRegistersResponse解码的Modbus串口客户端"""
+        
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # 替换功能码03的响应解码类
+            self.register(FastReadHoldingRegistersResponse)
+    
+    return FastSerialClient
 
 
 class TEVAASensor:
     """TEV/AA二合一传感器通信类"""
     
+    # 固定实例属性，省去每个实例的__dict__
+    __slots__ = ('device_addr', 'client', 'connected', 'retries', 'backoff',
+                 '_rhr', '_wrs', '_cfg_cache', '_lock', '_raw_frames', '_interrupted')
+    
     # 寄存器地址常量
     REG_TEV_VALUE = 5003        # TEV值(dB)
     REG_TEV_DISCHARGE_COUNT = 5004  # TEV放电次数
@@ -74,13 +251,36 @@ class TEVAASensor:
     REG_AA_WAVEFORM_START = 301
     REG_AA_WAVEFORM_END = 400
     
+    # 波形寄存器数量，在类定义时计算一次
+    _TEV_WAVEFORM_COUNT = REG_TEV_WAVEFORM_END - REG_TEV_WAVEFORM_START + 1
+    _AA_WAVEFORM_COUNT = REG_AA_WAVEFORM_END - REG_AA_WAVEFORM_START + 1
+    _ALL_WAVEFORM_COUNT = REG_AA_WAVEFORM_END - REG_TEV_WAVEFORM_START + 1
+    
     # 配置参数寄存器
     REG_DEVICE_ADDR = 401       # 设备地址
     REG_BAUD_RATE = 402         # 波特率
     REG_TEV_THRESHOLD = 404     # TEV背景阈值
     REG_AA_THRESHOLD = 405      # AA/AE背景阈值
     
-    def __init__(self, port, device_addr=1, baudrate=9600, timeout=1):
+    # Modbus功能码03单次最多读取的寄存器数量
+    MAX_READ_REGISTERS = 125
+    
+    # 读取失败重试时单次的最长退避时间(秒)
+    MAX_RETRY_BACKOFF = 5.0
+    
+    # 单次读取(含全部重试)的最长总耗时(秒)，超过后不再重试
+    MAX_RETRY_TIME = 3.0
+    
+    # 高频读取的(寄存器地址, 数量)，其请求帧固定不变，预先构造后直接收发
+    RAW_READ_REQUESTS = (
+        (REG_TEV_VALUE, 3),
+        (REG_TEV_WAVEFORM_START, _TEV_WAVEFORM_COUNT),
+        (REG_AA_WAVEFORM_START, _AA_WAVEFORM_COUNT),
+        (REG_TEV_WAVEFORM_START, MAX_READ_REGISTERS),
+        (REG_TEV_WAVEFORM_START + MAX_READ_REGISTERS, _ALL_WAVEFORM_COUNT - MAX_READ_REGISTERS),
+    )
+    
+    def __init__(self, port, device_addr=1, baudrate=9600, timeout=1, retries=3, backoff=0.1):
         """
         初始化传感器通信
         
@@ -89,9 +289,13 @@ class TEVAASensor:
             device_addr (int): 设备地址，默认为1
             baudrate (int): 波特率，默认为9600
             timeout (float): 通信超时时间(秒)，默认为1
+            retries (int): 读取失败时重试的次数，默认为3
+            backoff (float): 首次重试前的等待时间(秒)，之后每次加倍，默认为0.1
         """
         self.device_addr = device_addr
-        self.client = ModbusSerialClient(
+        self.retries = retries
+        self.backoff = backoff
+        self.client = _fast_client_class()(
             method='rtu',
             port=port,
             baudrate=baudrate,
@@ -101,48 +305,178 @@ class TEVAASensor:
             timeout=timeout
         )
         self.connected = False
+        # 缓存客户端的读写绑定方法，减少每次Modbus请求的属性查找
+        self._rhr = self.client.read_holding_registers
+        self._wrs = self.client.write_registers
+        # 配置寄存器缓存（寄存器地址 -> 值），写入后对应项失效，下次读取时从设备回读
+        self._cfg_cache = {}
+        # 串口事务锁，多个线程共用同一传感器对象时避免请求报文交错
+        self._lock = threading.Lock()
+        # 置位时打断读取重试的退避等待，由interrupt()/disconnect()设置，connect()清除
+        self._interrupted = threading.Event()
+        self._build_raw_frames()
+    
+    def _build_raw_frames(self):
+        """按当前设备地址预先构造高频读取的请求帧"""
+        self._raw_frames = {
+            (address, count): _build_read_frame(self.device_addr, address, count)
+            for address, count in self.RAW_READ_REQUESTS
+        }
     
     def connect(self):
         """连接到传感器"""
-        if not self.connected:
-            self.connected = self.client.connect()
-        return self.connected
+        with self._lock:
+            if not self.connected:
+                self.connected = self.client.connect()
+            self._interrupted.clear()
+            return self.connected
+    
+    def interrupt(self):
+        """打断其他线程中正在进行的读取重试等待，被打断的读取立即抛出最近一次的错误"""
+        self._interrupted.set()
     
     def disconnect(self):
         """断开与传感器的连接"""
-        if self.connected:
-            self.client.close()
-            self.connected = False
+        self._interrupted.set()
+        with self._lock:
+            if self.connected:
+                self.client.close()
+                self.connected = False
+            self._cfg_cache.clear()
     
-    def _read_register(self, address, count=1):
+    def _read_register(self, address, count=1, as_numpy=False):
         """
         读取寄存器值
         
         参数:
             address (int): 寄存器地址
             count (int): 寄存器数量
+            as_numpy (bool): 为True时返回numpy.uint16数组，默认返回列表
             
         返回:
-            list: 读取到的寄存器值列表，失败返回None
+            list 或 numpy.ndarray: 读取到的寄存器值，失败返回None
         """
-        if not self.connected and not self.connect():
-            raise ConnectionError("无法连接到传感器")
+        if not self.connected:
+            raise ModbusDeviceError("调用前必须已连接到传感器")
+        
+        deadline = time.monotonic() + self.MAX_RETRY_TIME
+        for attempt in range(self.retries + 1):
+            try:
+                return self._read_register_once(address, count, as_numpy)
+            except ModbusDeviceError:
+                # 设备明确拒绝了请求，重试结果不会改变
+                raise
+            except IOError:
+                # 串口通信异常(如干扰导致的超时或校验错误)，保持连接不变，按指数退避等待后重发请求；
+                # 重试次数或总耗时用尽、或等待被打断时抛出本次错误，由调用方决定是否重新连接
+                delay = min(self.MAX_RETRY_BACKOFF, self.backoff * 2 ** attempt)
+                if (attempt == self.retries or time.monotonic() + delay > deadline
+                        or self._interrupted.wait(delay)):
+                    raise
+    
+    def _read_registers_ndarray(self, address, count):
+        """
+        读取寄存器值并直接返回numpy数组
+        
+        预构造请求帧的读取直接从响应报文解码，不经过Python整数列表
+        
+        参数:
+            address (int): 寄存器地址
+            count (int): 寄存器数量
+        
+        返回:
+            numpy.ndarray: 读取到的寄存器值(uint16)
+        """
+        return self._read_register(address, count, as_numpy=True)
+    
+    def _read_register_once(self, address, count, as_numpy=False):
+        """
+        执行一次读取寄存器请求
+        
+        参数:
+            address (int): 寄存器地址
+            count (int): 寄存器数量
+            as_numpy (bool): 为True时返回numpy.uint16数组，默认返回列表
         
+        返回:
+            list 或 numpy.ndarray: 读取到的寄存器值
+        """
         try:
+            frame = self._raw_frames.get((address, count))
+            if frame is not None:
+                return self._read_raw(frame, count, as_numpy)
+            
             # pymodbus 2.5.3版本中，地址直接使用，无需address参数
-            result = self.client.read_holding_registers(
-                address=address-1,  # Modbus地址从0开始，而文档地址从1开始
-                count=count,
-                unit=self.device_addr  # pymodbus 2.5.3中使用unit而不是slave
-            )
+            with self._lock:
+                result = self._rhr(
+                    address=address-1,  # Modbus地址从0开始，而文档地址从1开始
+                    count=count,
+                    unit=self.device_addr  # pymodbus 2.5.3中使用unit而不是slave
+                )
             
-            if isinstance(result, ExceptionResponse):
+            if result.isError():
+                from pymodbus.pdu import ExceptionResponse
+                if isinstance(result, ExceptionResponse):
+                    raise ModbusDeviceError(f"读取寄存器失败: {result}")
+                from pymodbus.exceptions import ModbusException
                 raise ModbusException(f"读取寄存器失败: {result}")
-                
+            
+            if as_numpy:
+                return np.asarray(result.registers, dtype=np.uint16)
             return result.registers
+        except ModbusDeviceError:
+            raise
         except Exception as e:
             raise IOError(f"读取寄存器错误: {e}")
     
+    def _read_raw(self, frame, count, as_numpy=False):
+        """
+        直接在串口上收发预先构造的读寄存器请求帧，绕过pymodbus事务处理
+        
+        参数:
+            frame (bytes): 完整的RTU请求帧
+            count (int): 寄存器数量
+            as_numpy (bool): 为True时返回numpy.uint16数组，默认返回列表
+        
+        返回:
+            list 或 numpy.ndarray: 读取到的寄存器值
+        """
+        client = self.client
+        size = 5 + 2 * count  # 地址、功能码、字节数、数据、CRC
+        
+        with self._lock:
+            if client.socket is None:
+                raise ConnectionError("串口未打开")
+            # 与上一帧之间保持3.5字符的静默间隔
+            if client.last_frame_end:
+                delay = client.last_frame_end + client.silent_interval - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            client.socket.reset_input_buffer()
+            client.socket.write(frame)
+            # 先读3字节报文头：异常响应只有5字节，按正常长度读取会一直等到超时
+            response = client.socket.read(3)
+            if len(response) == 3 and response[1] & 0x80:
+                response += client.socket.read(2)
+            elif len(response) == 3:
+                response += client.socket.read(size - 3)
+            client.last_frame_end = round(time.time(), 6)
+        
+        if len(response) == 5 and response[1] & 0x80:
+            if response[0] != frame[0] or crc16_modbus(response[:3]) != struct.unpack_from('<H', response, 3)[0]:
+                raise IOError(f"异常响应报文错误: {response.hex()}")
+            raise ModbusDeviceError(f"读取寄存器失败: 设备返回异常码{response[2]}")
+        if len(response) != size:
+            raise IOError(f"响应长度错误: 期望{size}字节，实际{len(response)}字节")
+        if response[0] != frame[0] or response[1] != 0x03 or response[2] != 2 * count:
+            raise IOError(f"响应报文头错误: {response[:3].hex()}")
+        if crc16_modbus(response[:-2]) != struct.unpack_from('<H', response, size - 2)[0]:
+            raise IOError("响应CRC校验错误")
+        
+        if as_numpy:
+            return np.frombuffer(response, dtype='>u2', count=count, offset=3).astype(np.uint16)
+        return list(struct.unpack_from('>%dH' % count, response, 3))
+    
     def _write_register(self, address, values):
         """
         写入寄存器值
@@ -154,24 +488,46 @@ class TEVAASensor:
         返回:
             bool: 写入成功返回True，否则返回False
         """
-        if not self.connected and not self.connect():
-            raise ConnectionError("无法连接到传感器")
+        if not self.connected:
+            raise ModbusDeviceError("调用前必须已连接到传感器")
         
         try:
             # pymodbus 2.5.3版本中使用unit而不是slave
-            result = self.client.write_registers(
-                address=address-1,  # Modbus地址从0开始，而文档地址从1开始
-                values=values,
-                unit=self.device_addr
-            )
+            with self._lock:
+                result = self._wrs(
+                    address=address-1,  # Modbus地址从0开始，而文档地址从1开始
+                    values=values,
+                    unit=self.device_addr
+                )
             
-            if isinstance(result, ExceptionResponse):
+            if result.isError():
+                from pymodbus.exceptions import ModbusException
                 raise ModbusException(f"写入寄存器失败: {result}")
                 
             return True
         except Exception as e:
             raise IOError(f"写入寄存器错误: {e}")
     
+    def _read_config_register(self, address):
+        """
+        读取配置寄存器值，优先使用缓存
+        
+        参数:
+            address (int): 配置寄存器地址
+        
+        返回:
+            int: 寄存器值，失败返回None
+        """
+        if address in self._cfg_cache:
+            return self._cfg_cache[address]
+        
+        result = self._read_register(address)
+        if not result:
+            return None
+        self._cfg_cache[address] = result[0]
+        return result[0]
+    
+    @_ensure_connected
     def get_tev_value(self):
         """
         获取TEV值(dB)
@@ -182,6 +538,7 @@ class TEVAASensor:
         result = self._read_register(self.REG_TEV_VALUE)
         return result[0] if result else None
     
+    @_ensure_connected
     def get_tev_discharge_count(self):
         """
         获取TEV放电次数
@@ -192,6 +549,7 @@ class TEVAASensor:
         result = self._read_register(self.REG_TEV_DISCHARGE_COUNT)
         return result[0] if result else None
     
+    @_ensure_connected
     def get_aa_value(self):
         """
         获取AA/AE值(dB)
@@ -202,6 +560,7 @@ class TEVAASensor:
         result = self._read_register(self.REG_AA_VALUE)
         return result[0] if result else None
     
+    @_ensure_connected
     def get_all_sensor_values(self):
         """
         获取所有传感器值
@@ -224,26 +583,70 @@ class TEVAASensor:
         except Exception as e:
             raise IOError(f"获取传感器值错误: {e}")
     
-    def get_tev_waveform(self):
+    @_ensure_connected
+    def get_tev_waveform(self, as_numpy=False):
         """
         获取TEV波形数据
         
+        参数:
+            as_numpy (bool): 为True时返回numpy.uint16数组，默认返回列表
+        
         返回:
-            list: TEV波形数据列表
+            list 或 numpy.ndarray: TEV波形数据
         """
-        count = self.REG_TEV_WAVEFORM_END - self.REG_TEV_WAVEFORM_START + 1
-        return self._read_register(self.REG_TEV_WAVEFORM_START, count)
+        if as_numpy:
+            return self._read_registers_ndarray(self.REG_TEV_WAVEFORM_START, self._TEV_WAVEFORM_COUNT)
+        return self._read_register(self.REG_TEV_WAVEFORM_START, self._TEV_WAVEFORM_COUNT)
     
-    def get_aa_waveform(self):
+    @_ensure_connected
+    def get_aa_waveform(self, as_numpy=False):
         """
         获取AA/AE波形数据
         
+        参数:
+            as_numpy (bool): 为True时返回numpy.uint16数组，默认返回列表
+        
         返回:
-            list: AA/AE波形数据列表
+            list 或 numpy.ndarray: AA/AE波形数据
         """
-        count = self.REG_AA_WAVEFORM_END - self.REG_AA_WAVEFORM_START + 1
-        return self._read_register(self.REG_AA_WAVEFORM_START, count)
+        if as_numpy:
+            return self._read_registers_ndarray(self.REG_AA_WAVEFORM_START, self._AA_WAVEFORM_COUNT)
+        return self._read_register(self.REG_AA_WAVEFORM_START, self._AA_WAVEFORM_COUNT)
     
+    @_ensure_connected
+    def get_all_waveforms(self, as_numpy=False):
+        """
+        一次性获取TEV和AA/AE波形数据
+        
+        TEV(201-300)与AA/AE(301-400)波形寄存器地址连续，按Modbus单次最多
+        读取125个寄存器的限制拆分为125+75两次读取，再按波形切分。
+        
+        参数:
+            as_numpy (bool): 为True时返回numpy.uint16数组，默认返回列表
+        
+        返回:
+            tuple: (TEV波形数据, AA/AE波形数据)，失败返回None
+        """
+        total = self._ALL_WAVEFORM_COUNT
+        if as_numpy:
+            data = np.empty(total, dtype=np.uint16)
+            read = self._read_registers_ndarray
+        else:
+            data = [0] * total
+            read = self._read_register
+        
+        offset = 0
+        while offset < total:
+            count = min(self.MAX_READ_REGISTERS, total - offset)
+            result = read(self.REG_TEV_WAVEFORM_START + offset, count)
+            if result is None or len(result) != count:
+                return None
+            data[offset:offset + count] = result
+            offset += count
+        
+        return data[:self._TEV_WAVEFORM_COUNT], data[self._TEV_WAVEFORM_COUNT:]
+    
+    @_ensure_connected
     def get_device_address(self):
         """
         获取设备地址
@@ -251,9 +654,9 @@ class TEVAASensor:
         返回:
             int: 设备地址
         """
-        result = self._read_register(self.REG_DEVICE_ADDR)
-        return result[0] if result else None
+        return self._read_config_register(self.REG_DEVICE_ADDR)
     
+    @_ensure_connected
     def set_device_address(self, address):
         """
         设置设备地址
@@ -270,9 +673,12 @@ class TEVAASensor:
         if self._write_register(self.REG_DEVICE_ADDR, [address]):
             # 更新当前客户端使用的设备地址
             self.device_addr = address
+            self._build_raw_frames()
+            self._cfg_cache.pop(self.REG_DEVICE_ADDR, None)
             return True
         return False
     
+    @_ensure_connected
     def get_baud_rate(self):
         """
         获取波特率
@@ -280,9 +686,9 @@ class TEVAASensor:
         返回:
             int: 波特率
         """
-        result = self._read_register(self.REG_BAUD_RATE)
-        return result[0] if result else None
+        return self._read_config_register(self.REG_BAUD_RATE)
     
+    @_ensure_connected
     def set_baud_rate(self, baudrate):
         """
         设置波特率
@@ -297,8 +703,12 @@ class TEVAASensor:
         if baudrate not in valid_baudrates:
             raise ValueError(f"波特率必须是标准Modbus波特率之一: {valid_baudrates}")
         
-        return self._write_register(self.REG_BAUD_RATE, [baudrate])
+        if self._write_register(self.REG_BAUD_RATE, [baudrate]):
+            self._cfg_cache.pop(self.REG_BAUD_RATE, None)
+            return True
+        return False
     
+    @_ensure_connected
     def get_tev_threshold(self):
         """
         获取TEV背景阈值
@@ -306,9 +716,9 @@ class TEVAASensor:
         返回:
             int: TEV背景阈值
         """
-        result = self._read_register(self.REG_TEV_THRESHOLD)
-        return result[0] if result else None
+        return self._read_config_register(self.REG_TEV_THRESHOLD)
     
+    @_ensure_connected
     def set_tev_threshold(self, threshold):
         """
         设置TEV背景阈值
@@ -319,8 +729,12 @@ class TEVAASensor:
         返回:
             bool: 设置成功返回True，否则抛出异常
         """
-        return self._write_register(self.REG_TEV_THRESHOLD, [threshold])
+        if self._write_register(self.REG_TEV_THRESHOLD, [threshold]):
+            self._cfg_cache.pop(self.REG_TEV_THRESHOLD, None)
+            return True
+        return False
     
+    @_ensure_connected
     def get_aa_threshold(self):
         """
         获取AA/AE背景阈值
@@ -328,9 +742,9 @@ class TEVAASensor:
         返回:
             int: AA/AE背景阈值
         """
-        result = self._read_register(self.REG_AA_THRESHOLD)
-        return result[0] if result else None
+        return self._read_config_register(self.REG_AA_THRESHOLD)
     
+    @_ensure_connected
     def set_aa_threshold(self, threshold):
         """
         设置AA/AE背景阈值
@@ -341,7 +755,56 @@ class TEVAASensor:
         返回:
             bool: 设置成功返回True，否则抛出异常
         """
-        return self._write_register(self.REG_AA_THRESHOLD, [threshold])
+        if self._write_register(self.REG_AA_THRESHOLD, [threshold]):
+            self._cfg_cache.pop(self.REG_AA_THRESHOLD, None)
+            return True
+        return False
+    
+    @_ensure_connected
+    def get_thresholds(self):
+        """
+        一次性读取TEV和AA/AE背景阈值（寄存器404-405地址连续）
+        
+        返回:
+            tuple: (TEV背景阈值, AA/AE背景阈值)，失败返回None
+        """
+        cache = self._cfg_cache
+        if self.REG_TEV_THRESHOLD in cache and self.REG_AA_THRESHOLD in cache:
+            return cache[self.REG_TEV_THRESHOLD], cache[self.REG_AA_THRESHOLD]
+        
+        results = self._read_register(self.REG_TEV_THRESHOLD, 2)
+        if results and len(results) == 2:
+            tev_threshold, aa_threshold = results
+            cache[self.REG_TEV_THRESHOLD] = tev_threshold
+            cache[self.REG_AA_THRESHOLD] = aa_threshold
+            return tev_threshold, aa_threshold
+        return None
+    
+    @_ensure_connected
+    def get_config_block(self):
+        """
+        一次性读取全部配置参数（寄存器401-405）
+        
+        返回:
+            dict: 包含设备地址、波特率、TEV阈值和AA/AE阈值的字典，失败返回None
+        """
+        # 一次性读取5个寄存器，索引2对应的403寄存器未使用
+        results = self._read_register(self.REG_DEVICE_ADDR, 5)
+        
+        if results and len(results) == 5:
+            self._cfg_cache.update({
+                self.REG_DEVICE_ADDR: results[0],
+                self.REG_BAUD_RATE: results[1],
+                self.REG_TEV_THRESHOLD: results[3],
+                self.REG_AA_THRESHOLD: results[4]
+            })
+            return {
+                'device_addr': results[0],
+                'baud_rate': results[1],
+                'tev_threshold': results[3],
+                'aa_threshold': results[4]
+            }
+        return None
     
     def __enter__(self):
         """上下文管理器入口"""
@@ -353,6 +816,136 @@ class TEVAASensor:
         self.disconnect()
 
 
+class AsyncTEVAASensor:
+    """
+    TEV/AA二合一传感器异步通信类
+    
+    Modbus RTU同一总线上的请求只能串行执行，因此每个传感器使用一个单线程执行器
+    顺序执行同步请求；多个串口上的传感器可以通过asyncio.gather并发轮询，
+    事件循环在等待串口响应期间不会被阻塞。
+    """
+    
+    def __init__(self, port, device_addr=1, baudrate=9600, timeout=1):
+        """
+        初始化传感器通信
+        
+        参数:
+            port (str): 串口名称，如'COM1'或'/dev/ttyUSB0'
+            device_addr (int): 设备地址，默认为1
+            baudrate (int): 波特率，默认为9600
+            timeout (float): 通信超时时间(秒)，默认为1
+        """
+        self.sensor = TEVAASensor(port, device_addr, baudrate, timeout)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+    
+    async def _call(self, func, *args):
+        """在传感器专用线程中执行同步调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    async def connect(self):
+        """连接到传感器"""
+        return await self._call(self.sensor.connect)
+    
+    async def disconnect(self):
+        """断开与传感器的连接"""
+        await self._call(self.sensor.disconnect)
+    
+    async def get_all_sensor_values(self):
+        """
+        获取所有传感器值
+        
+        返回:
+            dict: 包含所有传感器值的字典
+        """
+        return await self._call(self.sensor.get_all_sensor_values)
+    
+    async def get_all_waveforms(self):
+        """
+        一次性获取TEV和AA/AE波形数据
+        
+        返回:
+            tuple: (TEV波形数据列表, AA/AE波形数据列表)，失败返回None
+        """
+        return await self._call(self.sensor.get_all_waveforms)
+    
+    async def get_config_block(self):
+        """
+        一次性读取全部配置参数
+        
+        返回:
+            dict: 包含设备地址、波特率、TEV阈值和AA/AE阈值的字典，失败返回None
+        """
+        return await self._call(self.sensor.get_config_block)
+    
+    async def __aenter__(self):
+        """异步上下文管理器入口"""
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器出口"""
+        await self.disconnect()
+        self._executor.shutdown(wait=False)
+
+
+async def read_sensors_concurrently(ports, device_addr=1, baudrate=9600):
+    """
+    并发读取多个串口上传感器的实时数据
+    
+    参数:
+        ports (list): 串口名称列表
+        device_addr (int): 设备地址，默认为1
+        baudrate (int): 波特率，默认为9600
+    
+    返回:
+        list: 与ports顺序对应的实时数据字典，读取失败的位置为异常对象
+    """
+    async def read_one(port):
+        async with AsyncTEVAASensor(port, device_addr, baudrate) as sensor:
+            return await sensor.get_all_sensor_values()
+    
+    return await asyncio.gather(*(read_one(port) for port in ports), return_exceptions=True)
+
+
+async def async_main(ports):
+    """多串口传感器并发读取示例主函数"""
+    print(f"正在并发读取 {len(ports)} 个串口上的传感器...")
+    results = await read_sensors_concurrently(ports)
+    failed = 0
+    for port, values in zip(ports, results):
+        if isinstance(values, Exception) or not values:
+            failed += 1
+            print(f"{port}: 读取失败 {values}")
+        else:
+            print(f"{port}: TEV值={values['tev_value']}dB, TEV放电次数={values['tev_discharge_count']}, "
+                  f"AA/AE值={values['aa_value']}dB")
+    return 1 if failed else 0
+
+
+def analyze_waveform(wave, threshold):
+    """
+    分析波形数据
+    
+    参数:
+        wave (numpy.ndarray): 波形数据
+        threshold (int): 背景阈值，读取失败时为None
+    
+    返回:
+        dict: 超过阈值的点数(阈值为None时为None)、峰值和平均值
+    """
+    return {
+        'peak_count': None if threshold is None else int(np.count_nonzero(wave > threshold)),
+        'peak_value': int(wave.max()),
+        'mean': float(wave.mean())
+    }
+
+
+def _format_peak_count(peak_count):
+    """格式化超阈值点数，阈值读取失败时显示为未知"""
+    return "未知(阈值读取失败)" if peak_count is None else peak_count
+
+
 def main():
     """传感器通信示例主函数"""
     # 显示欢迎信息
@@ -374,18 +967,19 @@ def main():
         # 使用上下文管理器自动处理连接和断开
         with TEVAASensor(port, device_addr, baudrate) as sensor:
             print(f"已连接到串口: {port}, 波特率: {baudrate}, 设备地址: {device_addr}")
+            if sensor.connected:
+                save_last_port(port)
             
-            # 读取基本配置信息
-            device_addr = sensor.get_device_address()
-            baudrate = sensor.get_baud_rate()
-            tev_threshold = sensor.get_tev_threshold()
-            aa_threshold = sensor.get_aa_threshold()
-            
-            print("\n设备配置信息:")
-            print(f"设备地址: {device_addr}")
-            print(f"波特率: {baudrate}")
-            print(f"TEV背景阈值: {tev_threshold}")
-            print(f"AA/AE背景阈值: {aa_threshold}")
+            # 读取基本配置信息（单次Modbus事务）
+            cfg = sensor.get_config_block()
+            if cfg:
+                print("\n设备配置信息:")
+                print(f"设备地址: {cfg['device_addr']}")
+                print(f"波特率: {cfg['baud_rate']}")
+                print(f"TEV背景阈值: {cfg['tev_threshold']}")
+                print(f"AA/AE背景阈值: {cfg['aa_threshold']}")
+            else:
+                print("\n无法读取设备配置信息")
             
             # 实时数据监测循环
             print("\n开始实时数据监测 (按Ctrl+C退出)...")
@@ -393,35 +987,60 @@ def main():
             print("时间\t\tTEV值(dB)\tTEV放电次数\tAA/AE值(dB)")
             print("-" * 50)
             
+            # 输出到终端时逐行刷新，重定向到文件时批量写入以减少flush次数
+            out = sys.stdout
+            flush_lines = 1 if out.isatty() else OUTPUT_FLUSH_LINES
+            pending = []
+            
             try:
+                # 使用单调时钟按固定节拍调度，读取耗时不会累积成周期漂移
+                deadline = time.monotonic()
                 while True:
                     # 获取所有传感器值
                     values = sensor.get_all_sensor_values()
                     
                     if values:
                         current_time = time.strftime("%H:%M:%S")
-                        print(f"{current_time}\t{values['tev_value']}\t\t{values['tev_discharge_count']}\t\t{values['aa_value']}")
+                        pending.append(f"{current_time}\t{values['tev_value']}\t\t{values['tev_discharge_count']}\t\t{values['aa_value']}\n")
                     else:
-                        print("无法读取传感器数据")
+                        pending.append("无法读取传感器数据\n")
+                    
+                    if len(pending) >= flush_lines:
+                        out.write(''.join(pending))
+                        out.flush()
+                        pending.clear()
                     
                     # 每秒更新一次
-                    time.sleep(1)
+                    deadline += POLL_INTERVAL
+                    delay = deadline - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        # 读取耗时超过周期，跳过错过的节拍
+                        deadline = time.monotonic()
             
             except KeyboardInterrupt:
-                print("\n监测已停止")
+                pending.append("\n监测已停止\n")
+            finally:
+                out.write(''.join(pending))
+                out.flush()
             
             # 读取波形数据示例
             print("\n读取波形数据示例:")
             try:
-                print("正在读取TEV波形数据...")
-                tev_waveform = sensor.get_tev_waveform()
+                print("正在读取TEV和AA/AE波形数据...")
+                tev_waveform, aa_waveform = sensor.get_all_waveforms(as_numpy=True)
                 print(f"TEV波形数据点数: {len(tev_waveform)}")
-                print(f"TEV波形前10个点: {tev_waveform[:10]}")
+                print(f"TEV波形前10个点: {tev_waveform[:10].tolist()}")
+                tev_stats = analyze_waveform(tev_waveform, sensor.get_tev_threshold())
+                print(f"TEV波形超阈值点数: {_format_peak_count(tev_stats['peak_count'])}, "
+                      f"峰值: {tev_stats['peak_value']}, 平均值: {tev_stats['mean']:.2f}")
                 
-                print("\n正在读取AA/AE波形数据...")
-                aa_waveform = sensor.get_aa_waveform()
                 print(f"AA/AE波形数据点数: {len(aa_waveform)}")
-                print(f"AA/AE波形前10个点: {aa_waveform[:10]}")
+                print(f"AA/AE波形前10个点: {aa_waveform[:10].tolist()}")
+                aa_stats = analyze_waveform(aa_waveform, sensor.get_aa_threshold())
+                print(f"AA/AE波形超阈值点数: {_format_peak_count(aa_stats['peak_count'])}, "
+                      f"峰值: {aa_stats['peak_value']}, 平均值: {aa_stats['mean']:.2f}")
             except Exception as e:
                 print(f"读取波形数据失败: {e}")
             
@@ -431,6 +1050,9 @@ def main():
                 # 读取原始阈值
                 old_tev_threshold = sensor.get_tev_threshold()
                 print(f"当前TEV阈值: {old_tev_threshold}")
+                if old_tev_threshold is None:
+                    # 读不到原始阈值就无法恢复，不修改设备参数
+                    raise IOError("无法读取当前TEV阈值")
                 
                 # 设置新阈值
                 new_tev_threshold = 55
@@ -461,4 +1083,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # 命令行给出串口列表时并发读取多个传感器，否则进入交互式测试
+    if len(sys.argv) > 1:
+        sys.exit(asyncio.run(async_main(sys.argv[1:])))
     sys.exit(main()) 
\ No newline at end of file
@@ -12,10 +12,13 @@ import serial.tools.list_ports
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QPushButton, QComboBox, 
                             QGroupBox, QGridLayout, QLineEdit, QStatusBar, 
-                            QMessageBox, QTabWidget, QFrame, QSplitter)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread, pyqtSlot
+                            QMessageBox, QTabWidget, QFrame, QSplitter,
+                            QGraphicsItem)
+from PyQt5.QtCore import (Qt, QTimer, pyqtSignal, QThread, pyqtSlot,
+                          QMutex, QWaitCondition, QObject, QRunnable, QThreadPool)
 from PyQt5.QtGui import QFont, QPalette, QColor
 
+import numpy as np
 import pyqtgraph as pg
 from pymodbus.client.sync import ModbusSerialClient
 from pymodbus.exceptions import ModbusException
@@ -24,71 +27,145 @@ from pymodbus.pdu import ExceptionResponse
 # 导入传感器类
 from tev_aa_combined import TEVAASensor, get_available_ports
 
+# 全局绘图配置：白色背景，关闭抗锯齿以减少绘制开销
+pg.setConfigOptions(background='w', antialias=False)
+
 
 class DataMonitorThread(QThread):
-    """数据监测线程，避免界面卡顿"""
-    data_updated = pyqtSignal(dict)  # 数据更新信号
-    error_occurred = pyqtSignal(str)  # 错误信号
+    """
+    数据监测线程，避免界面卡顿
+    
+    串口上的所有读取都在本线程中顺序执行：按采样间隔轮询实时数据，
+    收到波形刷新请求时立即唤醒并优先读取波形。
+    """
+    data_updated = pyqtSignal(dict)          # 数据更新信号
+    tev_waveform_ready = pyqtSignal(object)  # TEV波形数据信号(numpy数组)
+    aa_waveform_ready = pyqtSignal(object)   # AA波形数据信号(numpy数组)
+    waveform_finished = pyqtSignal()         # 单次波形刷新完成信号
+    error_occurred = pyqtSignal(str)         # 错误信号
     
-    def __init__(self, sensor, parent=None):
+    # 连续读取失败时的最短/最长退避等待时间(毫秒)
+    MIN_ERROR_BACKOFF_MS = 50
+    MAX_ERROR_BACKOFF_MS = 5000
+    
+    def __init__(self, sensor, interval_ms=100, parent=None):
         super().__init__(parent)
         self.sensor = sensor
-        self.running = False
+        self.interval_ms = interval_ms  # 采样间隔(毫秒)
+        self.running = True
+        self._waveform_pending = False
+        self._mutex = QMutex()
+        self._condition = QWaitCondition()
+    
+    def request_waveform(self):
+        """请求读取一次波形数据（可在任意线程调用）"""
+        self._mutex.lock()
+        self._waveform_pending = True
+        self._condition.wakeOne()
+        self._mutex.unlock()
     
     def run(self):
-        self.running = True
+        wait_ms = self.interval_ms
         while self.running:
+            # 优先处理波形刷新请求
+            self._mutex.lock()
+            waveform_pending = self._waveform_pending
+            self._waveform_pending = False
+            self._mutex.unlock()
+            if waveform_pending:
+                self.read_waveforms()
+                self.waveform_finished.emit()
+            
             try:
                 values = self.sensor.get_all_sensor_values()
                 if values:
                     self.data_updated.emit(values)
+                    wait_ms = self.interval_ms
                 else:
                     self.error_occurred.emit("读取传感器数据失败")
             except Exception as e:
+                # 轮询失败时不退出线程，否则后续波形刷新请求将无人处理；
+                # 按指数退避延长等待时间后继续轮询
                 self.error_occurred.emit(f"监测错误: {str(e)}")
-                break
+                wait_ms = min(self.MAX_ERROR_BACKOFF_MS,
+                              max(wait_ms, self.interval_ms, self.MIN_ERROR_BACKOFF_MS) * 2)
             
-            # 休眠一小段时间，避免过于频繁的请求
-            time.sleep(0.5)
+            # 按设定的采样间隔等待，收到波形请求或停止信号时提前唤醒
+            self._mutex.lock()
+            if self.running and not self._waveform_pending:
+                self._condition.wait(self._mutex, wait_ms)
+            self._mutex.unlock()
     
     def stop(self):
+        self._mutex.lock()
         self.running = False
+        self._condition.wakeOne()
+        self._mutex.unlock()
+        # 打断传感器读取重试的退避等待，避免停止线程时界面卡住
+        self.sensor.interrupt()
         self.wait()
+    
+    def read_waveforms(self):
+        """读取TEV和AA波形数据并发送信号"""
+        try:
+            # 一次性读取TEV和AA波形数据（寄存器地址连续）
+            waveforms = self.sensor.get_all_waveforms(as_numpy=True)
+            if waveforms is None:
+                self.error_occurred.emit("波形数据读取错误: 响应数据不完整")
+                return
+            
+            tev_waveform, aa_waveform = waveforms
+            self.tev_waveform_ready.emit(tev_waveform)
+            self.aa_waveform_ready.emit(aa_waveform)
+        except Exception as e:
+            self.error_occurred.emit(f"波形数据读取错误: {str(e)}")
 
 
-class WaveformThread(QThread):
-    """波形数据读取线程"""
-    tev_waveform_ready = pyqtSignal(list)  # TEV波形数据信号
-    aa_waveform_ready = pyqtSignal(list)   # AA波形数据信号
-    error_occurred = pyqtSignal(str)       # 错误信号
+class PortScanSignals(QObject):
+    """串口扫描任务的信号（QRunnable不能直接发送信号）"""
+    ports_ready = pyqtSignal(list)  # 扫描结果信号
+
+
+class PortScanTask(QRunnable):
+    """串口扫描任务，在线程池中枚举串口，避免阻塞界面"""
     
-    def __init__(self, sensor, parent=None):
-        super().__init__(parent)
-        self.sensor = sensor
+    def __init__(self):
+        super().__init__()
+        self.signals = PortScanSignals()
     
     def run(self):
+        # 扫描出错时也必须发出结果信号，否则界面会认为扫描一直在进行而不再刷新
+        ports = []
         try:
-            # 读取TEV波形数据
-            tev_waveform = self.sensor.get_tev_waveform()
-            self.tev_waveform_ready.emit(tev_waveform)
-            
-            # 读取AA波形数据
-            aa_waveform = self.sensor.get_aa_waveform()
-            self.aa_waveform_ready.emit(aa_waveform)
+            ports = get_available_ports()
         except Exception as e:
-            self.error_occurred.emit(f"波形数据读取错误: {str(e)}")
+            print(f"扫描串口失败: {e}")
+        finally:
+            self.signals.ports_ready.emit(ports)
 
 
 class SensorGUI(QMainWindow):
     """TEV/AA传感器GUI主窗口"""
     
+    # 波形曲线画笔，创建一次后复用
+    _TEV_PEN = pg.mkPen(color='b', width=2)
+    _AA_PEN = pg.mkPen(color='g', width=2)
+    
+    # 最小采样间隔(毫秒)，避免轮询请求占满串口总线
+    MIN_POLL_INTERVAL_MS = 20
+    
     def __init__(self):
         super().__init__()
         self.sensor = None
         self.data_thread = None
-        self.waveform_thread = None
+        self.poll_interval_ms = 100
+        self._last_ports = None      # 上次扫描到的串口列表，用于判断是否变化
+        self._port_scan_task = None  # 正在执行的串口扫描任务
         self.tev_waveform_data = []
         self.aa_waveform_data = []
+        # 波形横坐标，长度固定，预先分配复用
+        self._x_axis = np.arange(TEVAASensor.REG_TEV_WAVEFORM_END - TEVAASensor.REG_TEV_WAVEFORM_START + 1,
+                                 dtype=np.float64)
         
         self.init_ui()
         self.refresh_ports()
@@ -97,6 +174,18 @@ class SensorGUI(QMainWindow):
         self.port_timer = QTimer(self)
         self.port_timer.timeout.connect(self.refresh_ports)
         self.port_timer.start(5000)  # 每5秒刷新一次
+        
+        # 创建定时器，按固定频率刷新数据显示，与采样速率解耦
+        self._latest_values = None
+        self._last_values = (None, None, None)  # 标签上当前显示的值
+        self.display_timer = QTimer(self)
+        self.display_timer.timeout.connect(self.refresh_value_labels)
+        self.display_timer.start(100)  # 每100毫秒刷新一次
+        
+        # 波形刷新防抖定时器，短时间内的多次刷新请求合并为一次读取
+        self._refresh_debounce = QTimer(self)
+        self._refresh_debounce.setSingleShot(True)
+        self._refresh_debounce.timeout.connect(self.request_waveform_read)
     
     def init_ui(self):
         """初始化用户界面"""
@@ -159,6 +248,14 @@ class SensorGUI(QMainWindow):
         addr_layout.addWidget(self.addr_spin)
         connection_layout.addLayout(addr_layout)
         
+        # 采样间隔
+        interval_layout = QVBoxLayout()
+        interval_layout.addWidget(QLabel("采样间隔(ms):"))
+        self.interval_edit = QLineEdit("100")
+        self.interval_edit.setFixedWidth(80)
+        interval_layout.addWidget(self.interval_edit)
+        connection_layout.addLayout(interval_layout)
+        
         # 连接按钮
         self.connect_btn = QPushButton("连接")
         self.connect_btn.clicked.connect(self.toggle_connection)
@@ -230,12 +327,15 @@ class SensorGUI(QMainWindow):
         tev_tab = QWidget()
         tev_layout = QVBoxLayout(tev_tab)
         self.tev_plot = pg.PlotWidget()
-        self.tev_plot.setBackground('w')
         self.tev_plot.setTitle("TEV波形图", color="b", size="14pt")
         self.tev_plot.setLabel('left', 'TEV幅值', units='dB')
         self.tev_plot.setLabel('bottom', '样本点', units='')
         self.tev_plot.showGrid(x=True, y=True)
-        self.tev_curve = self.tev_plot.plot(pen=pg.mkPen(color='b', width=2))
+        self.tev_plot.setDownsampling(auto=True, mode='peak')
+        self.tev_plot.setClipToView(True)
+        self.tev_curve = self.tev_plot.plot(pen=self._TEV_PEN)
+        # 缓存曲线绘制结果，仅在数据变化时重绘（PlotDataItem本身不绘制，需设置在其内部的PlotCurveItem上）
+        self.tev_curve.curve.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         tev_layout.addWidget(self.tev_plot)
         
         # 添加波形控制按钮
@@ -252,12 +352,14 @@ class SensorGUI(QMainWindow):
         aa_tab = QWidget()
         aa_layout = QVBoxLayout(aa_tab)
         self.aa_plot = pg.PlotWidget()
-        self.aa_plot.setBackground('w')
         self.aa_plot.setTitle("AA/AE波形图", color="g", size="14pt")
         self.aa_plot.setLabel('left', 'AA/AE幅值', units='dB')
         self.aa_plot.setLabel('bottom', '样本点', units='')
         self.aa_plot.showGrid(x=True, y=True)
-        self.aa_curve = self.aa_plot.plot(pen=pg.mkPen(color='g', width=2))
+        self.aa_plot.setDownsampling(auto=True, mode='peak')
+        self.aa_plot.setClipToView(True)
+        self.aa_curve = self.aa_plot.plot(pen=self._AA_PEN)
+        self.aa_curve.curve.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         aa_layout.addWidget(self.aa_plot)
         
         tab_widget.addTab(aa_tab, "AA/AE波形")
@@ -268,16 +370,31 @@ class SensorGUI(QMainWindow):
         self.statusBar.showMessage("就绪")
     
     def refresh_ports(self):
-        """刷新可用串口列表"""
+        """在后台线程中扫描可用串口"""
+        # 上一次扫描尚未完成时不重复提交
+        if self._port_scan_task is not None:
+            return
+        
+        self._port_scan_task = PortScanTask()
+        self._port_scan_task.signals.ports_ready.connect(self.update_port_list)
+        QThreadPool.globalInstance().start(self._port_scan_task)
+    
+    @pyqtSlot(list)
+    def update_port_list(self, available_ports):
+        """串口扫描完成后更新串口列表，列表无变化时不做任何操作"""
+        self._port_scan_task = None
+        ports = tuple(sorted(available_ports))
+        if ports == self._last_ports:
+            return
+        self._last_ports = ports
+        
         # 保存当前选择
         current_port = self.port_combo.currentText()
         
         # 清空列表
         self.port_combo.clear()
         
-        # 获取可用串口
-        available_ports = get_available_ports()
-        for port, desc in available_ports:
+        for port, desc in ports:
             self.port_combo.addItem(f"{port} - {desc}", port)
         
         # 恢复之前的选择（如果存在）
@@ -298,11 +415,21 @@ class SensorGUI(QMainWindow):
             QMessageBox.warning(self, "连接错误", "请选择串口")
             return
         
+        try:
+            interval_ms = int(self.interval_edit.text())
+        except ValueError:
+            QMessageBox.warning(self, "参数错误", "采样间隔必须是整数(毫秒)")
+            return
+        if interval_ms < self.MIN_POLL_INTERVAL_MS:
+            interval_ms = self.MIN_POLL_INTERVAL_MS
+            self.interval_edit.setText(str(interval_ms))
+        
         try:
             # 提取端口名称
             port_data = self.port_combo.currentData()
             baudrate = int(self.baud_combo.currentText())
             device_addr = int(self.addr_spin.text())
+            self.poll_interval_ms = interval_ms
             
             # 创建传感器对象
             self.statusBar.showMessage("正在连接传感器...")
@@ -319,6 +446,7 @@ class SensorGUI(QMainWindow):
             self.port_combo.setEnabled(False)
             self.baud_combo.setEnabled(False)
             self.addr_spin.setEnabled(False)
+            self.interval_edit.setEnabled(False)
             self.refresh_btn.setEnabled(False)
             
             # 启用参数设置按钮
@@ -359,6 +487,7 @@ class SensorGUI(QMainWindow):
         self.port_combo.setEnabled(True)
         self.baud_combo.setEnabled(True)
         self.addr_spin.setEnabled(True)
+        self.interval_edit.setEnabled(True)
         self.refresh_btn.setEnabled(True)
         
         # 禁用参数设置按钮
@@ -367,6 +496,8 @@ class SensorGUI(QMainWindow):
         self.refresh_tev_btn.setEnabled(False)
         
         # 清空数据显示
+        self._latest_values = None
+        self._last_values = (None, None, None)
         self.tev_value_label.setText("--")
         self.tev_count_label.setText("--")
         self.aa_value_label.setText("--")
@@ -378,13 +509,11 @@ class SensorGUI(QMainWindow):
     def read_device_params(self):
         """读取设备参数"""
         try:
-            # 读取阈值参数
-            tev_threshold = self.sensor.get_tev_threshold()
-            if tev_threshold is not None:
+            # 一次性读取TEV和AA/AE阈值参数
+            thresholds = self.sensor.get_thresholds()
+            if thresholds is not None:
+                tev_threshold, aa_threshold = thresholds
                 self.tev_threshold_edit.setText(str(tev_threshold))
-            
-            aa_threshold = self.sensor.get_aa_threshold()
-            if aa_threshold is not None:
                 self.aa_threshold_edit.setText(str(aa_threshold))
         
         except Exception as e:
@@ -393,48 +522,76 @@ class SensorGUI(QMainWindow):
     def start_data_monitoring(self):
         """启动数据监测线程"""
         if self.sensor and self.sensor.connected:
-            self.data_thread = DataMonitorThread(self.sensor)
+            self.data_thread = DataMonitorThread(self.sensor, self.poll_interval_ms)
             self.data_thread.data_updated.connect(self.update_sensor_data)
+            self.data_thread.tev_waveform_ready.connect(self.update_tev_waveform)
+            self.data_thread.aa_waveform_ready.connect(self.update_aa_waveform)
+            self.data_thread.waveform_finished.connect(lambda: self.refresh_tev_btn.setEnabled(True))
             self.data_thread.error_occurred.connect(self.handle_error)
             self.data_thread.start()
     
     def refresh_waveforms(self):
         """刷新波形数据"""
-        if not self.sensor or not self.sensor.connected:
+        if not self.sensor or not self.sensor.connected or not self.data_thread:
             return
         
         # 禁用刷新按钮，避免重复点击
         self.refresh_tev_btn.setEnabled(False)
         self.statusBar.showMessage("正在读取波形数据...")
         
-        # 启动波形读取线程
-        self.waveform_thread = WaveformThread(self.sensor)
-        self.waveform_thread.tev_waveform_ready.connect(self.update_tev_waveform)
-        self.waveform_thread.aa_waveform_ready.connect(self.update_aa_waveform)
-        self.waveform_thread.error_occurred.connect(self.handle_error)
-        self.waveform_thread.finished.connect(lambda: self.refresh_tev_btn.setEnabled(True))
-        self.waveform_thread.start()
+        # 100毫秒内的重复请求合并为一次
+        self._refresh_debounce.start(100)
+    
+    def request_waveform_read(self):
+        """通知数据监测线程读取一次波形"""
+        if self.data_thread:
+            self.data_thread.request_waveform()
     
     @pyqtSlot(dict)
     def update_sensor_data(self, values):
-        """更新传感器数据显示"""
-        self.tev_value_label.setText(str(values['tev_value']))
-        self.tev_count_label.setText(str(values['tev_discharge_count']))
-        self.aa_value_label.setText(str(values['aa_value']))
+        """保存最新传感器数据，由定时器统一刷新显示"""
+        self._latest_values = values
     
-    @pyqtSlot(list)
+    def refresh_value_labels(self):
+        """将最新传感器数据写入显示标签"""
+        values = self._latest_values
+        if values is None:
+            return
+        self._latest_values = None
+        
+        # 只更新数值发生变化的标签，避免无谓的重绘
+        current = (values['tev_value'], values['tev_discharge_count'], values['aa_value'])
+        last = self._last_values
+        if current[0] != last[0]:
+            self.tev_value_label.setText(str(current[0]))
+        if current[1] != last[1]:
+            self.tev_count_label.setText(str(current[1]))
+        if current[2] != last[2]:
+            self.aa_value_label.setText(str(current[2]))
+        self._last_values = current
+    
+    @pyqtSlot(object)
     def update_tev_waveform(self, data):
         """更新TEV波形图"""
         self.tev_waveform_data = data
-        self.tev_curve.setData(range(len(data)), data)
-        self.statusBar.showMessage("TEV波形数据已更新")
+        # 暂停重绘，曲线和状态栏的更新合并为一次绘制
+        self.tev_plot.setUpdatesEnabled(False)
+        try:
+            self.tev_curve.setData(self._x_axis, data, connect='all', skipFiniteCheck=True)
+            self.statusBar.showMessage("TEV波形数据已更新")
+        finally:
+            self.tev_plot.setUpdatesEnabled(True)
     
-    @pyqtSlot(list)
+    @pyqtSlot(object)
     def update_aa_waveform(self, data):
         """更新AA波形图"""
         self.aa_waveform_data = data
-        self.aa_curve.setData(range(len(data)), data)
-        self.statusBar.showMessage("AA/AE波形数据已更新")
+        self.aa_plot.setUpdatesEnabled(False)
+        try:
+            self.aa_curve.setData(self._x_axis, data, connect='all', skipFiniteCheck=True)
+            self.statusBar.showMessage("AA/AE波形数据已更新")
+        finally:
+            self.aa_plot.setUpdatesEnabled(True)
     
     def set_tev_threshold(self):
         """设置TEV背景阈值"""
@@ -7,16 +7,19 @@ TEV/AA二合一传感器简易GUI监测程序
 
 import sys
 import time
+import threading
 import serial.tools.list_ports
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QLabel, QPushButton, QComboBox, 
                             QGroupBox, QLineEdit, QStatusBar, 
-                            QMessageBox, QTabWidget, QSplitter)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread, pyqtSlot
+                            QMessageBox, QTabWidget, QSplitter, QGraphicsItem)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot, QObject, QRunnable, QThreadPool
+import numpy as np
 import pyqtgraph as pg
 from pymodbus.client.sync import ModbusSerialClient
 from pymodbus.exceptions import ModbusException
 from pymodbus.pdu import ExceptionResponse
+from pymodbus.register_read_message import ReadHoldingRegistersRequest
 
 
 # 原tev_aa_combined.py的函数，获取可用串口列表
@@ -48,6 +51,9 @@ class TEVAASensor:
     REG_AA_WAVEFORM_START = 301
     REG_AA_WAVEFORM_END = 400
     
+    # Modbus功能码03单次最多读取的寄存器数量（响应字节数字段只有1字节）
+    MAX_READ_REGISTERS = 125
+    
     # 配置参数寄存器
     REG_DEVICE_ADDR = 401       # 设备地址
     REG_BAUD_RATE = 402         # 波特率
@@ -75,6 +81,26 @@ class TEVAASensor:
             timeout=timeout
         )
         self.connected = False
+        # 最近一次读取的波形数据(numpy数组)，用于波形统计
+        self.tev_waveform = None
+        self.aa_waveform = None
+        # 串口事务锁，波形线程和数据监测线程共用同一传感器对象时避免请求报文交错
+        self._lock = threading.Lock()
+        self._build_requests()
+    
+    def _build_requests(self):
+        """按当前设备地址预先创建高频读取的请求对象，每次读取直接复用"""
+        self._req_scalars = ReadHoldingRegistersRequest(self.REG_TEV_VALUE, 3, unit=self.device_addr)
+        
+        # 波形寄存器按单次最多读取数量拆分
+        self._req_waveforms = []
+        total = self.REG_AA_WAVEFORM_END - self.REG_TEV_WAVEFORM_START + 1
+        offset = 0
+        while offset < total:
+            count = min(self.MAX_READ_REGISTERS, total - offset)
+            self._req_waveforms.append(ReadHoldingRegistersRequest(
+                self.REG_TEV_WAVEFORM_START + offset, count, unit=self.device_addr))
+            offset += count
     
     def connect(self):
         """连接到传感器"""
@@ -96,6 +122,24 @@ class TEVAASensor:
             address (int): 寄存器地址
             count (int): 寄存器数量
             
+        返回:
+            list: 读取到的寄存器值列表，失败返回None
+        """
+        # pymodbus 2.5.3版本中使用unit而不是slave
+        request = ReadHoldingRegistersRequest(
+            address,  # Modbus地址从0开始，而文档地址从1开始
+            count,
+            unit=self.device_addr
+        )
+        return self._execute(request)
+    
+    def _execute(self, request):
+        """
+        执行读寄存器请求
+        
+        参数:
+            request (ReadHoldingRegistersRequest): 读保持寄存器请求
+        
         返回:
             list: 读取到的寄存器值列表，失败返回None
         """
@@ -103,12 +147,8 @@ class TEVAASensor:
             raise ConnectionError("无法连接到传感器")
         
         try:
-            # pymodbus 2.5.3版本中使用unit而不是slave
-            result = self.client.read_holding_registers(
-                address=address,  # Modbus地址从0开始，而文档地址从1开始
-                count=count,
-                unit=self.device_addr
-            )
+            with self._lock:
+                result = self.client.execute(request)
             
             if result is None:
                 raise ModbusException("读取寄存器失败：接收到空响应")
@@ -141,11 +181,12 @@ class TEVAASensor:
         
         try:
             # pymodbus 2.5.3版本中使用unit而不是slave
-            result = self.client.write_registers(
-                address=address-1,  # Modbus地址从0开始，而文档地址从1开始
-                values=values,
-                unit=self.device_addr
-            )
+            with self._lock:
+                result = self.client.write_registers(
+                    address=address-1,  # Modbus地址从0开始，而文档地址从1开始
+                    values=values,
+                    unit=self.device_addr
+                )
             
             if isinstance(result, ExceptionResponse):
                 raise ModbusException(f"写入寄存器失败: {result}")
@@ -193,7 +234,7 @@ class TEVAASensor:
         """
         try:
             # 一次性读取3个寄存器
-            result = self._read_register(self.REG_TEV_VALUE, 3)
+            result = self._execute(self._req_scalars)
             if result and len(result) == 3:
                 return {
                     'tev_value': result[0],
@@ -225,6 +266,50 @@ class TEVAASensor:
         count = self.REG_AA_WAVEFORM_END - self.REG_AA_WAVEFORM_START + 1
         return self._read_register(self.REG_AA_WAVEFORM_START, count)
     
+    def get_all_waveforms(self):
+        """
+        一次性获取TEV和AA/AE波形数据
+        
+        TEV与AA/AE波形寄存器地址连续，按Modbus单次最多读取125个寄存器的限制
+        拆分为125+75两次读取，再按波形切分。
+        
+        返回:
+            tuple: (TEV波形数据, AA/AE波形数据)，均为numpy.uint16数组，失败返回None
+        """
+        tev_count = self.REG_TEV_WAVEFORM_END - self.REG_TEV_WAVEFORM_START + 1
+        data = []
+        for request in self._req_waveforms:
+            result = self._execute(request)
+            if not result or len(result) != request.count:
+                return None
+            data.extend(result)
+        
+        # 在传感器接口处一次性转换为numpy数组，绘图时无需再逐个转换
+        data = np.asarray(data, dtype=np.uint16)
+        self.tev_waveform = data[:tev_count]
+        self.aa_waveform = data[tev_count:]
+        return self.tev_waveform, self.aa_waveform
+    
+    @property
+    def tev_peak(self):
+        """最近一次读取的TEV波形峰值，未读取时为None"""
+        return None if self.tev_waveform is None else int(self.tev_waveform.max())
+    
+    @property
+    def tev_mean(self):
+        """最近一次读取的TEV波形平均值，未读取时为None"""
+        return None if self.tev_waveform is None else float(self.tev_waveform.mean())
+    
+    @property
+    def aa_peak(self):
+        """最近一次读取的AA/AE波形峰值，未读取时为None"""
+        return None if self.aa_waveform is None else int(self.aa_waveform.max())
+    
+    @property
+    def aa_mean(self):
+        """最近一次读取的AA/AE波形平均值，未读取时为None"""
+        return None if self.aa_waveform is None else float(self.aa_waveform.mean())
+    
     def get_device_address(self):
         """
         获取设备地址
@@ -251,6 +336,7 @@ class TEVAASensor:
         if self._write_register(self.REG_DEVICE_ADDR, [address]):
             # 更新当前客户端使用的设备地址
             self.device_addr = address
+            self._build_requests()
             return True
         return False
     
@@ -334,90 +420,61 @@ class TEVAASensor:
         self.disconnect()
 
 
-class WaveformThread(QThread):
-    """波形数据读取线程"""
-    tev_waveform_ready = pyqtSignal(list)  # TEV波形数据信号
-    aa_waveform_ready = pyqtSignal(list)   # AA波形数据信号
-    error_occurred = pyqtSignal(str)       # 错误信号
-    
-    def __init__(self, sensor, auto_refresh=False, parent=None):
-        super().__init__(parent)
-        self.sensor = sensor
-        self.auto_refresh = auto_refresh
-        self.running = False
-    
-    def run(self):
-        self.running = True
-        
-        while self.running:
-            try:
-                # 读取TEV波形数据
-                tev_waveform = self.sensor.get_tev_waveform()
-                self.tev_waveform_ready.emit(tev_waveform)
-                
-                # 读取AA波形数据
-                aa_waveform = self.sensor.get_aa_waveform()
-                self.aa_waveform_ready.emit(aa_waveform)
-                
-                # 如果不是自动刷新模式，读取一次后退出
-                if not self.auto_refresh:
-                    break
-                
-                # 自动刷新模式下，每隔一段时间刷新一次
-                time.sleep(1)
-                
-            except Exception as e:
-                self.error_occurred.emit(f"波形数据读取错误: {str(e)}")
-                break
-    
-    def stop(self):
-        self.running = False
-        self.wait()
+class SensorTaskSignals(QObject):
+    """传感器读取任务的信号（QRunnable不能直接发送信号）"""
+    result_ready = pyqtSignal(object)  # 读取结果信号
+    error_occurred = pyqtSignal(str)   # 错误信号
 
 
-class DataMonitorThread(QThread):
-    """数据监测线程，周期性获取传感器数据"""
-    data_updated = pyqtSignal(dict)  # 数据更新信号
-    error_occurred = pyqtSignal(str)  # 错误信号
+class SensorReadTask(QRunnable):
+    """传感器读取任务，在线程池中执行一次读取，避免阻塞界面"""
     
-    def __init__(self, sensor, refresh_interval=1.0, parent=None):
-        super().__init__(parent)
-        self.sensor = sensor
-        self.refresh_interval = refresh_interval  # 刷新间隔(秒)
-        self.running = False
+    def __init__(self, read_func, error_prefix):
+        """
+        参数:
+            read_func (callable): 读取函数，返回值通过result_ready信号发出
+            error_prefix (str): 读取出错时错误信息的前缀
+        """
+        super().__init__()
+        self.read_func = read_func
+        self.error_prefix = error_prefix
+        self.signals = SensorTaskSignals()
     
     def run(self):
-        self.running = True
-        
-        while self.running:
-            try:
-                # 获取传感器数据
-                values = self.sensor.get_all_sensor_values()
-                if values:
-                    self.data_updated.emit(values)
-                else:
-                    self.error_occurred.emit("获取传感器数据失败")
-                
-                # 等待刷新间隔
-                time.sleep(self.refresh_interval)
-                
-            except Exception as e:
-                self.error_occurred.emit(f"数据监测错误: {str(e)}")
-                time.sleep(2)  # 出错后等待2秒再尝试
-    
-    def stop(self):
-        self.running = False
-        self.wait()
+        try:
+            result = self.read_func()
+        except Exception as e:
+            self.signals.error_occurred.emit(f"{self.error_prefix}: {str(e)}")
+            return
+        self.signals.result_ready.emit(result)
 
 
 class SimpleSensorGUI(QMainWindow):
     """TEV/AA传感器简易GUI主窗口"""
     
+    # 线程池队列优先级：排队等待时实时数据读取先于波形读取执行
+    _DATA_TASK_PRIORITY = 1
+    _WAVEFORM_TASK_PRIORITY = 0
+    
     def __init__(self):
         super().__init__()
         self.sensor = None
-        self.waveform_thread = None
-        self.data_monitor_thread = None  # 添加数据监测线程属性
+        self.waveform_task = None  # 正在执行的波形读取任务
+        self.data_task = None      # 正在执行的传感器数据读取任务
+        self._ports_cache = ()     # 上次枚举到的串口，用于判断是否变化
+        self._port_index_by_device = {}  # 串口名称 -> 下拉框索引
+        self._last_tev_val = None  # 标签上当前显示的TEV值
+        self._last_tev_cnt = None  # 标签上当前显示的TEV放电次数
+        
+        # 串口读取在单线程的线程池中执行，同一时刻只有一个Modbus事务
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+        # 波形横坐标，长度固定，预先分配复用
+        self._x_axis = np.arange(TEVAASensor.REG_TEV_WAVEFORM_END - TEVAASensor.REG_TEV_WAVEFORM_START + 1,
+                                 dtype=np.int32)
+        # 上一次绘制的波形数据，数据未变化时跳过重绘
+        self._last_tev = None
+        self._last_aa = None
         
         self.init_ui()
         self.refresh_ports()
@@ -426,6 +483,14 @@ class SimpleSensorGUI(QMainWindow):
         self.port_timer = QTimer(self)
         self.port_timer.timeout.connect(self.refresh_ports)
         self.port_timer.start(5000)  # 每5秒刷新一次
+        
+        # 传感器数据定时读取
+        self.data_timer = QTimer(self)
+        self.data_timer.timeout.connect(self.read_sensor_data)
+        
+        # 波形自动刷新定时器
+        self.wave_timer = QTimer(self)
+        self.wave_timer.timeout.connect(self.read_waveforms)
     
     def init_ui(self):
         """初始化用户界面"""
@@ -581,7 +646,12 @@ class SimpleSensorGUI(QMainWindow):
         self.tev_plot.showGrid(x=True, y=True)
         # 设置默认Y轴范围
         self.tev_plot.setYRange(0, 300)
+        # 只绘制可见范围内的数据，缩小时按峰值降采样
+        self.tev_plot.setClipToView(True)
+        self.tev_plot.setDownsampling(auto=True, mode='peak')
         self.tev_curve = self.tev_plot.plot(pen=pg.mkPen(color='b', width=2))
+        # 缓存曲线绘制结果，仅在数据变化时重绘（PlotDataItem本身不绘制，需设置在其内部的PlotCurveItem上）
+        self.tev_curve.curve.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         tev_layout.addWidget(self.tev_plot)
         
         tab_widget.addTab(tev_tab, "TEV波形")
@@ -615,7 +685,12 @@ class SimpleSensorGUI(QMainWindow):
         self.aa_plot.showGrid(x=True, y=True)
         # 设置默认Y轴范围
         self.aa_plot.setYRange(0, 300)
+        # 只绘制可见范围内的数据，缩小时按峰值降采样
+        self.aa_plot.setClipToView(True)
+        self.aa_plot.setDownsampling(auto=True, mode='peak')
         self.aa_curve = self.aa_plot.plot(pen=pg.mkPen(color='g', width=2))
+        # 缓存曲线绘制结果，仅在数据变化时重绘
+        self.aa_curve.curve.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
         aa_layout.addWidget(self.aa_plot)
         
         tab_widget.addTab(aa_tab, "AA/AE波形")
@@ -635,19 +710,25 @@ class SimpleSensorGUI(QMainWindow):
     
     def refresh_ports(self):
         """刷新可用串口列表"""
+        # 获取可用串口，与上次相同时不重建列表
+        available_ports = tuple(get_available_ports())
+        if available_ports == self._ports_cache:
+            return
+        self._ports_cache = available_ports
+        
         # 保存当前选择
-        current_port = self.port_combo.currentText()
+        current_port = self.port_combo.currentData()
         
         # 清空列表
         self.port_combo.clear()
+        self._port_index_by_device = {}
         
-        # 获取可用串口
-        available_ports = get_available_ports()
         for port, desc in available_ports:
+            self._port_index_by_device[port] = self.port_combo.count()
             self.port_combo.addItem(f"{port} - {desc}", port)
         
         # 恢复之前的选择（如果存在）
-        index = self.port_combo.findText(current_port, Qt.MatchStartsWith)
+        index = self._port_index_by_device.get(current_port, -1)
         if index >= 0:
             self.port_combo.setCurrentIndex(index)
     
@@ -688,6 +769,9 @@ class SimpleSensorGUI(QMainWindow):
             self.refresh_btn.setEnabled(False)
             self.refresh_wave_btn.setEnabled(True)
             
+            # 连接期间串口列表无需刷新
+            self.port_timer.stop()
+            
             # 启动数据监测线程
             self.start_data_monitor()
             
@@ -707,15 +791,10 @@ class SimpleSensorGUI(QMainWindow):
     
     def disconnect_sensor(self):
         """断开与传感器的连接"""
-        # 停止数据监测线程
-        if self.data_monitor_thread:
-            self.data_monitor_thread.stop()
-            self.data_monitor_thread = None
-        
-        # 停止波形线程
-        if self.waveform_thread:
-            self.waveform_thread.stop()
-            self.waveform_thread = None
+        # 停止定时读取，并等待正在执行的读取任务结束
+        self.data_timer.stop()
+        self.wave_timer.stop()
+        self.thread_pool.waitForDone()
         
         # 断开传感器连接
         if self.sensor:
@@ -729,10 +808,13 @@ class SimpleSensorGUI(QMainWindow):
         self.addr_edit.setEnabled(True)
         self.refresh_btn.setEnabled(True)
         self.refresh_wave_btn.setEnabled(False)
+        self.port_timer.start(5000)
         
         # 清空数据显示
         self.tev_value_label.setText("--")
         self.tev_count_label.setText("--")
+        self._last_tev_val = None
+        self._last_tev_cnt = None
         # self.aa_value_label.setText("--")
         # self.update_time_label.setText("--")
         
@@ -747,59 +829,90 @@ class SimpleSensorGUI(QMainWindow):
         self.refresh_wave_btn.setEnabled(False)
         self.statusBar.showMessage("正在读取波形数据...")
         
-        # 启动波形读取线程
-        if self.waveform_thread and self.waveform_thread.isRunning():
-            self.waveform_thread.stop()
+        self.read_waveforms()
+    
+    def read_waveforms(self):
+        """提交一次波形读取任务，上一次读取未完成时跳过"""
+        if not self.sensor or not self.sensor.connected or self.waveform_task is not None:
+            return
+        
+        self.waveform_task = SensorReadTask(self.sensor.get_all_waveforms, "波形数据读取错误")
+        self.waveform_task.signals.result_ready.connect(self.on_waveforms_read)
+        self.waveform_task.signals.error_occurred.connect(self.on_waveforms_error)
+        # 波形读取耗时较长，排在等待中的实时数据读取之后，避免数值显示被推迟
+        self.thread_pool.start(self.waveform_task, self._WAVEFORM_TASK_PRIORITY)
+    
+    @pyqtSlot(object)
+    def on_waveforms_read(self, waveforms):
+        """波形读取完成"""
+        self.waveform_task = None
+        self.refresh_wave_btn.setEnabled(self.sensor is not None)
+        if waveforms is None:
+            self.statusBar.showMessage("波形数据读取错误: 响应数据不完整")
+            return
         
-        # 创建一个非自动刷新的线程
-        self.waveform_thread = WaveformThread(self.sensor, False)
-        self.waveform_thread.tev_waveform_ready.connect(self.update_tev_waveform)
-        self.waveform_thread.aa_waveform_ready.connect(self.update_aa_waveform)
-        self.waveform_thread.error_occurred.connect(self.handle_error)
-        self.waveform_thread.finished.connect(lambda: self.refresh_wave_btn.setEnabled(True))
-        self.waveform_thread.start()
+        # 两条曲线在同一次绘制中更新
+        tev_waveform, aa_waveform = waveforms
+        self.setUpdatesEnabled(False)
+        try:
+            self.update_tev_waveform(tev_waveform)
+            self.update_aa_waveform(aa_waveform)
+        finally:
+            self.setUpdatesEnabled(True)
+    
+    @pyqtSlot(str)
+    def on_waveforms_error(self, message):
+        """波形读取出错"""
+        self.waveform_task = None
+        self.refresh_wave_btn.setEnabled(self.sensor is not None)
+        self.handle_error(message)
     
     def start_auto_refresh(self):
         """启动自动刷新波形"""
         if not self.sensor or not self.sensor.connected:
             return
         
-        if self.waveform_thread and self.waveform_thread.isRunning():
-            self.waveform_thread.stop()
-        
-        # 创建一个自动刷新的线程
-        self.waveform_thread = WaveformThread(self.sensor, True)
-        self.waveform_thread.tev_waveform_ready.connect(self.update_tev_waveform)
-        self.waveform_thread.aa_waveform_ready.connect(self.update_aa_waveform)
-        self.waveform_thread.error_occurred.connect(self.handle_error)
-        self.waveform_thread.start()
+        # 立即读取一次，之后每秒刷新一次
+        self.read_waveforms()
+        self.wave_timer.start(1000)
         
         self.statusBar.showMessage("自动刷新波形已启动")
     
     def stop_auto_refresh(self):
         """停止自动刷新波形"""
-        if self.waveform_thread and self.waveform_thread.isRunning():
-            self.waveform_thread.stop()
-            self.waveform_thread = None
+        if self.wave_timer.isActive():
+            self.wave_timer.stop()
             self.statusBar.showMessage("自动刷新波形已停止")
     
     def toggle_auto_refresh(self, value):
         """切换自动刷新状态"""
         if value == "开启" and self.sensor and self.sensor.connected:
             self.start_auto_refresh()
-        elif value == "关闭" and self.waveform_thread:
+        elif value == "关闭":
             self.stop_auto_refresh()
     
-    @pyqtSlot(list)
+    @pyqtSlot(object)
     def update_tev_waveform(self, data):
         """更新TEV波形图"""
-        self.tev_curve.setData(range(len(data)), data)
+        if self._last_tev is None or not np.array_equal(self._last_tev, data):
+            self._last_tev = data
+            self.tev_plot.setUpdatesEnabled(False)
+            try:
+                self.tev_curve.setData(self._x_axis, data)
+            finally:
+                self.tev_plot.setUpdatesEnabled(True)
         self.statusBar.showMessage("TEV波形数据已更新")
     
-    @pyqtSlot(list)
+    @pyqtSlot(object)
     def update_aa_waveform(self, data):
         """更新AA波形图"""
-        self.aa_curve.setData(range(len(data)), data)
+        if self._last_aa is None or not np.array_equal(self._last_aa, data):
+            self._last_aa = data
+            self.aa_plot.setUpdatesEnabled(False)
+            try:
+                self.aa_curve.setData(self._x_axis, data)
+            finally:
+                self.aa_plot.setUpdatesEnabled(True)
         self.statusBar.showMessage("AA/AE波形数据已更新")
     
     @pyqtSlot(str)
@@ -811,27 +924,51 @@ class SimpleSensorGUI(QMainWindow):
             self.disconnect_sensor()
     
     def start_data_monitor(self):
-        """启动数据监测线程"""
+        """启动传感器数据定时读取"""
         if not self.sensor or not self.sensor.connected:
             return
         
-        if self.data_monitor_thread and self.data_monitor_thread.isRunning():
-            self.data_monitor_thread.stop()
+        # 立即读取一次，之后每秒读取一次
+        self.read_sensor_data()
+        self.data_timer.start(1000)
+    
+    def read_sensor_data(self):
+        """提交一次传感器数据读取任务，上一次读取未完成时跳过"""
+        if not self.sensor or not self.sensor.connected or self.data_task is not None:
+            return
         
-        # 创建并启动数据监测线程
-        self.data_monitor_thread = DataMonitorThread(self.sensor, 1.0)
-        self.data_monitor_thread.data_updated.connect(self.update_sensor_data)
-        self.data_monitor_thread.error_occurred.connect(self.handle_error)
-        self.data_monitor_thread.start()
+        self.data_task = SensorReadTask(self.sensor.get_all_sensor_values, "数据监测错误")
+        self.data_task.signals.result_ready.connect(self.on_sensor_data_read)
+        self.data_task.signals.error_occurred.connect(self.on_sensor_data_error)
+        self.thread_pool.start(self.data_task, self._DATA_TASK_PRIORITY)
+    
+    @pyqtSlot(object)
+    def on_sensor_data_read(self, values):
+        """传感器数据读取完成"""
+        self.data_task = None
+        if values:
+            self.update_sensor_data(values)
+        else:
+            self.statusBar.showMessage("获取传感器数据失败")
+    
+    @pyqtSlot(str)
+    def on_sensor_data_error(self, message):
+        """传感器数据读取出错"""
+        self.data_task = None
+        self.handle_error(message)
     
     @pyqtSlot(dict)
     def update_sensor_data(self, data):
-        """更新传感器数据显示"""
-        if 'tev_value' in data:
-            self.tev_value_label.setText(f"{data['tev_value']}")
+        """更新传感器数据显示，数值未变化时不更新标签"""
+        value = data.get('tev_value')
+        if value is not None and value != self._last_tev_val:
+            self.tev_value_label.setNum(int(value))
+            self._last_tev_val = value
         
-        if 'tev_discharge_count' in data:
-            self.tev_count_label.setText(f"{data['tev_discharge_count']}")
+        count = data.get('tev_discharge_count')
+        if count is not None and count != self._last_tev_cnt:
+            self.tev_count_label.setNum(int(count))
+            self._last_tev_cnt = count
         
         # if 'aa_value' in data:
         #     self.aa_value_label.setText(f"{data['aa_value']}")
@@ -842,13 +979,10 @@ class SimpleSensorGUI(QMainWindow):
     
     def closeEvent(self, event):
         """窗口关闭事件处理"""
-        # 停止数据监测线程
-        if self.data_monitor_thread:
-            self.data_monitor_thread.stop()
-        
-        # 停止波形线程
-        if self.waveform_thread:
-            self.waveform_thread.stop()
+        # 停止定时读取，并等待正在执行的读取任务结束
+        self.data_timer.stop()
+        self.wave_timer.stop()
+        self.thread_pool.waitForDone()
         
         # 断开传感器
         if self.sensor and self.sensor.connected:
@@ -878,6 +1012,10 @@ if __name__ == "__main__":
     # 创建应用程序
     app = QApplication(sys.argv)
     app.setStyle('Fusion')  # 使用Fusion风格
+    # 关闭界面动画效果，减少重绘
+    for effect in (Qt.UI_AnimateCombo, Qt.UI_AnimateMenu, Qt.UI_AnimateTooltip, Qt.UI_AnimateToolBox):
+        app.setEffectEnabled(effect, False)
+    pg.setConfigOptions(antialias=False)  # 关闭抗锯齿以减少绘制开销
     
     # 创建并显示GUI
     window = SimpleSensorGUI()
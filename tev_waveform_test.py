@@ -5,12 +5,16 @@ TEV波形图谱读取测试程序
 直接使用串口发送Modbus RTU指令读取波形数据
 """
 
+import os
 import sys
 import time
+import queue
+import threading
 import struct
+import functools
 import serial
 import serial.tools.list_ports
-import binascii
+import numpy as np
 
 
 def get_available_ports():
@@ -21,6 +25,56 @@ def get_available_ports():
     return ports
 
 
+def _build_crc16_table():
+    """生成Modbus CRC16查找表(多项式0xA001)，每个字节值对应一次8位移位异或的结果"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_MODBUS_TABLE = _build_crc16_table()
+
+
+def _build_crc16_slice_tables(count=8):
+    """
+    生成slice-by-N查找表，第k张表对应某字节之后再经过k个零字节的CRC推进结果
+    
+    参数:
+        count (int): 表的数量，即每次并行处理的字节数
+    
+    返回:
+        tuple: 由count张256项元组组成的查找表
+    """
+    tables = [_CRC16_MODBUS_TABLE]
+    for _ in range(1, count):
+        prev = tables[-1]
+        tables.append(tuple((crc >> 8) ^ _CRC16_MODBUS_TABLE[crc & 0xFF] for crc in prev))
+    return tuple(tables)
+
+
+(_CRC_T0, _CRC_T1, _CRC_T2, _CRC_T3,
+ _CRC_T4, _CRC_T5, _CRC_T6, _CRC_T7) = _build_crc16_slice_tables(8)
+
+
+# 功能码03单次最多读取125个寄存器(响应字节数字段只有1字节)
+MAX_READ_REGISTERS = 125
+
+# 是否校验响应CRC，设置环境变量TEV_SKIP_CRC=1可在调试时跳过
+VERIFY_CRC = os.environ.get('TEV_SKIP_CRC') != '1'
+
+# 读保持寄存器请求头：设备地址(1) + 功能码(1) + 起始地址(2) + 数量(2)
+_REQUEST_HEADER = struct.Struct('>BBHH')
+# 报文尾部CRC，低字节在前
+_CRC_FIELD = struct.Struct('<H')
+
+
 def calculate_crc(data):
     """
     计算Modbus CRC16校验码
@@ -29,23 +83,27 @@ def calculate_crc(data):
         data (bytes): 要计算校验码的数据
         
     返回:
-        bytes: 两字节的CRC校验码，低字节在前，高字节在后
+        int: 16位CRC校验值，写入报文时低字节在前，高字节在后
     """
     crc = 0xFFFF
-    for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 0x0001:
-                crc = (crc >> 1) ^ 0xA001
-            else:
-                crc >>= 1
-    # 返回低字节在前，高字节在后的CRC
-    return bytes([crc & 0xFF, (crc >> 8) & 0xFF])
+    # 每8字节作为一个小端64位整数整体异或，再用8张表一次折叠
+    block_end = len(data) - len(data) % 8
+    for offset in range(0, block_end, 8):
+        w = int.from_bytes(data[offset:offset + 8], 'little') ^ crc
+        crc = (_CRC_T7[w & 0xFF] ^ _CRC_T6[(w >> 8) & 0xFF] ^
+               _CRC_T5[(w >> 16) & 0xFF] ^ _CRC_T4[(w >> 24) & 0xFF] ^
+               _CRC_T3[(w >> 32) & 0xFF] ^ _CRC_T2[(w >> 40) & 0xFF] ^
+               _CRC_T1[(w >> 48) & 0xFF] ^ _CRC_T0[w >> 56])
+    # 不足8字节的尾部逐字节查表
+    for byte in data[block_end:]:
+        crc = (crc >> 8) ^ _CRC16_MODBUS_TABLE[(crc ^ byte) & 0xFF]
+    return crc
 
 
+@functools.lru_cache(maxsize=64)
 def build_read_registers_request(device_addr, start_address, count):
     """
-    构建读取保持寄存器的请求
+    构建读取保持寄存器的请求，相同参数的报文只计算一次
     
     参数:
         device_addr (int): 设备地址
@@ -58,13 +116,30 @@ def build_read_registers_request(device_addr, start_address, count):
     # Modbus地址从0开始，文档从1开始，所以需要减1
     modbus_address = start_address
     
-    # 构造帧：设备地址(1) + 功能码(1) + 起始地址(2) + 数量(2)
-    request = struct.pack('>BBHH', device_addr, 0x03, modbus_address, count)
+    # 在8字节缓冲区内原地构造帧：设备地址(1) + 功能码(1) + 起始地址(2) + 数量(2) + CRC(2)
+    request = bytearray(8)
+    _REQUEST_HEADER.pack_into(request, 0, device_addr, 0x03, modbus_address, count)
     
     # 添加CRC
-    request += calculate_crc(request)
+    _CRC_FIELD.pack_into(request, 6, calculate_crc(memoryview(request)[:6]))
     
-    return request
+    # 结果会被缓存复用，返回不可变的bytes
+    return bytes(request)
+
+
+def expected_response_length(register_count):
+    """读保持寄存器响应长度 = 设备地址(1) + 功能码(1) + 字节数(1) + 数据(2*寄存器数) + CRC(2)"""
+    return 5 + register_count * 2
+
+
+def _check_crc(mv):
+    """校验报文尾部CRC，失败时打印计算值与接收值"""
+    received_crc = _CRC_FIELD.unpack_from(mv, len(mv) - 2)[0]
+    calculated_crc = calculate_crc(mv[:-2])
+    if received_crc != calculated_crc:
+        print(f"CRC校验失败: 计算值=0x{calculated_crc:04X}，接收值=0x{received_crc:04X}")
+        return False
+    return True
 
 
 def parse_read_registers_response(response, register_count):
@@ -76,21 +151,24 @@ def parse_read_registers_response(response, register_count):
         register_count (int): 预期的寄存器数量
         
     返回:
-        list 或 None: 解析出的寄存器值列表，失败返回None
+        numpy.ndarray 或 None: 解析出的寄存器值(uint16数组)，失败返回None
     """
-    # 检查响应长度 = 设备地址(1) + 功能码(1) + 字节数(1) + 数据(2*寄存器数) + CRC(2)
-    expected_length = 5 + register_count * 2
-    
-    if len(response) != expected_length:
-        print(f"响应长度错误: 预期{expected_length}字节，实际{len(response)}字节")
-        return None
+    expected_length = expected_response_length(register_count)
+    # 零拷贝视图，后续切片不再复制报文
+    mv = memoryview(response).cast('B')
     
-    # 检查功能码（是否有异常）
-    if response[1] == 0x83:
+    # 异常响应固定为5字节：设备地址(1) + 功能码0x83(1) + 异常码(1) + CRC(2)，先于长度检查识别
+    if len(response) == 5 and response[1] == 0x83:
+        if VERIFY_CRC and not _check_crc(mv):
+            return None
         exception_code = response[2]
         print(f"Modbus异常: 代码={exception_code}")
         return None
     
+    if len(response) != expected_length:
+        print(f"响应长度错误: 预期{expected_length}字节，实际{len(response)}字节")
+        return None
+    
     # 检查功能码是否为0x03
     if response[1] != 0x03:
         print(f"功能码错误: 预期0x03，实际接收{hex(response[1])}")
@@ -103,25 +181,160 @@ def parse_read_registers_response(response, register_count):
         return None
     
     # 验证CRC
-    received_data = response[:-2]
-    received_crc = response[-2:]
-    calculated_crc = calculate_crc(received_data)
-    
-    if received_crc != calculated_crc:
-        print(f"CRC校验失败: 计算值={calculated_crc.hex()}，接收值={received_crc.hex()}")
+    if VERIFY_CRC and not _check_crc(mv):
         return None
     
-    # 解析数据
-    registers = []
-    for i in range(3, 3 + byte_count, 2):
-        register_value = (response[i] << 8) + response[i+1]
-        registers.append(register_value)
+    # 解析数据：按大端16位整数一次性解码全部寄存器，并转为本机字节序
+    registers = np.frombuffer(response, dtype='>u2', count=register_count, offset=3).astype(np.uint16)
     
     return registers
 
 
+def read_response(ser, expected_length, timeout=2.0):
+    """
+    按预期长度读取完整响应帧
+    
+    参数:
+        ser (serial.Serial): 已打开的串口
+        expected_length (int): 预期的响应字节数
+        timeout (float): 整帧读取的总超时时间(秒)
+    
+    返回:
+        bytes: 读取到的数据，超时时可能不足预期长度
+    """
+    buf = bytearray()
+    deadline = time.monotonic() + timeout
+    # 先按整帧在线路上的传输时间(每字符按11位计)等待，之后大多只需一次读取即可取完
+    wire_time = expected_length * 11 / ser.baudrate
+    time.sleep(min(wire_time * 0.9, timeout))
+    while len(buf) < expected_length and time.monotonic() < deadline:
+        # 驱动缓冲区已有数据时整块取出，否则阻塞等待剩余字节
+        pending = ser.in_waiting
+        chunk = ser.read(min(pending, expected_length - len(buf)) if pending else expected_length - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return bytes(buf)
+
+
+def read_ranges(ser, device_addr, ranges, max_gap=8, timeout=2.0):
+    """
+    合并读取多个寄存器区间，相邻或间隔不超过max_gap的区间合并为一次03读取，
+    超过单次读取上限(125个)的区间先拆分为多段再合并
+    
+    参数:
+        ser (serial.Serial): 已打开的串口
+        device_addr (int): 设备地址
+        ranges (list): (起始地址, 寄存器数量)元组列表
+        max_gap (int): 允许合并的最大间隔寄存器数，多读少量寄存器比多一次往返更快
+        timeout (float): 每次读取的超时时间(秒)
+    
+    返回:
+        dict: {(起始地址, 寄存器数量): 寄存器值数组}，所在批次读取失败的区间值为None
+    """
+    # 超过单次读取上限的区间拆分为不超过125个寄存器的分段
+    ranges = set(ranges)
+    pieces = {}
+    for start, count in ranges:
+        pieces[(start, count)] = [(start + offset, min(MAX_READ_REGISTERS, count - offset))
+                                  for offset in range(0, count, MAX_READ_REGISTERS)]
+    
+    # 按起始地址排序后贪心合并，合并后的跨度不超过单次读取上限
+    groups = []
+    for start, count in sorted({piece for parts in pieces.values() for piece in parts}):
+        end = start + count
+        if groups:
+            group_start, group_end, members = groups[-1]
+            if start - group_end <= max_gap and max(group_end, end) - group_start <= MAX_READ_REGISTERS:
+                groups[-1] = (group_start, max(group_end, end), members)
+                members.append((start, count))
+                continue
+        groups.append((start, end, [(start, count)]))
+    
+    piece_results = {}
+    for group_start, group_end, members in groups:
+        group_count = group_end - group_start
+        request = build_read_registers_request(device_addr, group_start, group_count)
+        ser.reset_input_buffer()
+        ser.write(request)
+        response = read_response(ser, expected_response_length(group_count), timeout)
+        registers = parse_read_registers_response(response, group_count)
+        
+        # 按各区间在批次内的偏移切出对应数据
+        for start, count in members:
+            if registers is None:
+                piece_results[(start, count)] = None
+            else:
+                offset = start - group_start
+                piece_results[(start, count)] = registers[offset:offset + count]
+    
+    # 拼接拆分过的区间，任一分段失败则整个区间为None
+    results = {}
+    for key, parts in pieces.items():
+        values = [piece_results[part] for part in parts]
+        if any(value is None for value in values):
+            results[key] = None
+        elif len(values) == 1:
+            results[key] = values[0]
+        else:
+            results[key] = np.concatenate(values)
+    return results
+
+
+def poll_registers(ser, device_addr, start_address, count, callback,
+                   max_polls=None, interval=0.0, timeout=2.0):
+    """
+    连续轮询读取寄存器，串口收发与报文解析流水线并行
+    
+    当前帧的CRC校验与解析在后台线程中进行，主循环随即发出下一帧请求，
+    解析耗时被下一帧的线路传输时间覆盖。两者之间用有界队列做背压。
+    
+    参数:
+        ser (serial.Serial): 已打开的串口
+        device_addr (int): 设备地址
+        start_address (int): 起始寄存器地址
+        count (int): 寄存器数量
+        callback (callable): 每帧解析完成后以寄存器数组(失败为None)调用
+        max_polls (int): 轮询次数，None表示一直轮询直到KeyboardInterrupt
+        interval (float): 两次请求之间的额外间隔(秒)
+        timeout (float): 每帧读取的超时时间(秒)
+    """
+    request = build_read_registers_request(device_addr, start_address, count)
+    response_length = expected_response_length(count)
+    frames = queue.Queue(maxsize=4)
+    
+    def parse_worker():
+        while True:
+            response = frames.get()
+            if response is None:
+                break
+            # 回调异常不能终止解析线程，否则队列写满后主循环会永久阻塞
+            try:
+                callback(parse_read_registers_response(response, count))
+            except Exception as e:
+                print(f"处理轮询数据出错: {e}")
+    
+    worker = threading.Thread(target=parse_worker, daemon=True)
+    worker.start()
+    
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            ser.reset_input_buffer()
+            ser.write(request)
+            frames.put(read_response(ser, response_length, timeout))
+            polls += 1
+            if interval:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        frames.put(None)
+        worker.join()
+
+
 def select_port():
-    """选择串口"""
+    """选择串口，串口列表只在进入时和输入r重新扫描时枚举"""
     ports = get_available_ports()
     
     if not ports:
@@ -132,20 +345,30 @@ def select_port():
     for i, (port, desc) in enumerate(ports):
         print(f"{i+1}. {port} - {desc}")
     
-    choice = input("\n请选择串口编号 (q退出): ")
-    if choice.lower() == 'q':
-        return None
-    
-    try:
-        index = int(choice) - 1
+    while True:
+        choice = input("\n请选择串口编号 (r重新扫描, q退出): ").lower()
+        if choice == 'q':
+            return None
+        
+        if choice == 'r':
+            ports = get_available_ports()
+            if not ports:
+                print("未检测到串口设备")
+                return None
+            print("\n可用串口:")
+            for i, (port, desc) in enumerate(ports):
+                print(f"{i+1}. {port} - {desc}")
+            continue
+        
+        try:
+            index = int(choice) - 1
+        except ValueError:
+            print("请输入数字")
+            continue
+        
         if 0 <= index < len(ports):
             return ports[index][0]
-        else:
-            print("无效的选择")
-            return select_port()
-    except ValueError:
-        print("请输入数字")
-        return select_port()
+        print("无效的选择")
 
 
 def main():
@@ -179,7 +402,7 @@ def main():
     
     # 打印请求报文
     print("\n发送请求:")
-    print(f"原始报文: {binascii.hexlify(request).decode().upper()}")
+    print(f"原始报文: {request.hex().upper()}")
     print(f"报文分析: 设备地址={device_addr}, 功能码=03, 起始地址={tev_start_address-1}(0x{(tev_start_address-1):04X}), 寄存器数量={tev_register_count}(0x{tev_register_count:04X})")
     
     # 打开串口
@@ -203,13 +426,13 @@ def main():
         ser.write(request)
         
         # 读取响应 (预期: 设备地址1 + 功能码1 + 字节数1 + 数据2*count + CRC2)
-        expected_response_length = 5 + tev_register_count * 2
-        response = ser.read(expected_response_length)
+        response_length = expected_response_length(tev_register_count)
+        response = read_response(ser, response_length, timeout=2.0)
         
         # 打印原始响应
         print(f"\n接收响应: {len(response)}字节")
         if response:
-            print(f"原始响应: {binascii.hexlify(response).decode().upper()}")
+            print(f"原始响应: {response.hex().upper()}")
         else:
             print("未收到响应或响应超时")
             ser.close()
@@ -218,7 +441,7 @@ def main():
         # 解析响应
         registers = parse_read_registers_response(response, tev_register_count)
         
-        if registers:
+        if registers is not None:
             print(f"\n成功读取TEV波形数据，共{len(registers)}个点")
             
             # 显示前10个点（如果有）
@@ -228,19 +451,20 @@ def main():
                 print(f"点{i+1}: {registers[i]}")
             
             # 显示基本统计信息
-            if registers:
+            if len(registers):
+                reg_min, reg_max, reg_mean = registers.min(), registers.max(), registers.mean()
                 print(f"\n数据统计:")
-                print(f"最小值: {min(registers)}")
-                print(f"最大值: {max(registers)}")
-                print(f"平均值: {sum(registers)/len(registers):.2f}")
+                print(f"最小值: {reg_min}")
+                print(f"最大值: {reg_max}")
+                print(f"平均值: {reg_mean:.2f}")
             
             # 保存数据
             save_option = input("\n是否保存波形数据到文件? (y/n): ").lower()
             if save_option == 'y':
                 filename = "tev_waveform_data.txt"
                 with open(filename, 'w') as f:
-                    for i, value in enumerate(registers):
-                        f.write(f"{i+1}, {value}\n")
+                    # 一次性拼接全部行后整体写入
+                    f.write("".join(f"{i}, {value}\n" for i, value in enumerate(registers, 1)))
                 print(f"波形数据已保存到 {filename}")
         else:
             print("解析波形数据失败")